@@ -1,6 +1,18 @@
+import ast
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, create_engine
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import sessionmaker
 
 from agno.agent import Agent
 from agno.models.google import Gemini
@@ -11,21 +23,173 @@ INSTRUCTIONS = """You are an expert Big query Writer
 อย่าพิมพ์หรือแนบ SQL ในคำตอบ ยกเว้นผู้ใช้ระบุให้ “แสดง SQL” อย่างชัดเจน"""
 
 DB_URL = "./my_agent_data.db"
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
 
 
-def build_agent():
+def _set_sqlite_pragmas(dbapi_conn, _record) -> None:
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    cur.close()
+
+
+@lru_cache(maxsize=None)
+def get_db_engine(pool_size: int = 5) -> Engine:
+    # One pooled engine shared by every agent: WAL lets readers run alongside
+    # the single writer, busy_timeout makes writers wait instead of failing.
+    db_path = Path(DB_URL).resolve()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={
+            "check_same_thread": False,
+            "timeout": DB_BUSY_TIMEOUT_MS / 1000,
+        },
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=DB_BUSY_TIMEOUT_MS / 1000,
+    )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+class PooledSqliteStorage(SqliteStorage):
+    # SqliteStorage drops a db_engine passed on its own and falls back to an
+    # in-memory database, so build from the URL and rebind to the shared engine.
+    def __init__(self, table_name: str, db_engine: Engine):
+        super().__init__(table_name=table_name, db_url=str(db_engine.url))
+        discarded = self.db_engine
+        self.db_engine = db_engine
+        discarded.dispose()
+        self.inspector = inspect(db_engine)
+        self.SqlSession = sessionmaker(bind=db_engine)
+
+
+DESCRIBE_WORKERS = int(os.getenv("BQ_DESCRIBE_WORKERS", "8"))
+_DESCRIBE_POOL = ThreadPoolExecutor(
+    max_workers=DESCRIBE_WORKERS, thread_name_prefix="bq-describe"
+)
+
+
+CACHE_SCHEMA_TTL_S = float(os.getenv("CACHE_SCHEMA_TTL_S", "600"))
+CACHE_SCHEMA_MAX_ENTRIES = 256
+
+# (project, dataset, table or query) -> (stored_at, result), shared by every
+# pooled agent since schemas change over hours, not requests.
+_SCHEMA_CACHE: Dict[Tuple[str, str, Optional[str]], Tuple[float, str]] = {}
+_SCHEMA_CACHE_LOCK = Lock()
+
+
+def _schema_cached(
+    key: Tuple[str, str, Optional[str]], fetch: Callable[[], str]
+) -> str:
+    now = time.monotonic()
+    with _SCHEMA_CACHE_LOCK:
+        hit = _SCHEMA_CACHE.get(key)
+    if hit is not None and now - hit[0] <= CACHE_SCHEMA_TTL_S:
+        return hit[1]
+
+    result = fetch()
+    # Upstream tools report failures in-band: "Error ..." from the schema
+    # calls, and '""' from run_sql_query, whose _run_sql swallows exceptions.
+    if not result or result == '""' or result.startswith("Error"):
+        return result
+    with _SCHEMA_CACHE_LOCK:
+        _SCHEMA_CACHE.pop(key, None)
+        _SCHEMA_CACHE[key] = (now, result)
+        while len(_SCHEMA_CACHE) > CACHE_SCHEMA_MAX_ENTRIES:
+            del _SCHEMA_CACHE[next(iter(_SCHEMA_CACHE))]
+    return result
+
+
+class BatchedBigQueryTools(GoogleBigQueryTools):
+    def __init__(self, *args, describe_all_tables: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        if describe_all_tables:
+            self.register(self.describe_all_tables)
+
+    def list_tables(self) -> str:
+        """Use this function to get a list of table names in the dataset.
+        Returns:
+            str: list of tables in the dataset.
+        """
+        return _schema_cached(
+            (self.project, self.dataset, None), super().list_tables
+        )
+
+    def describe_table(self, table_id: str) -> str:
+        """Use this function to describe a table.
+        Args:
+            table_id (str): The name of the table to get the schema for.
+        Returns:
+            str: schema of a table
+        """
+        return _schema_cached(
+            (self.project, self.dataset, table_id),
+            lambda: super(BatchedBigQueryTools, self).describe_table(table_id),
+        )
+
+    def run_sql_query(self, query: str) -> str:
+        """Use this function to run a BigQuery SQL query and return the result.
+        Args:
+            query (str): The query to run.
+        Returns:
+            str: Result of the Google BigQuery SQL query.
+        Notes:
+            - The result may be empty if the query does not return any data.
+        """
+        if "INFORMATION_SCHEMA" not in query.upper():
+            return super().run_sql_query(query)
+        return _schema_cached(
+            (self.project, self.dataset, query),
+            lambda: super(BatchedBigQueryTools, self).run_sql_query(query),
+        )
+
+    def describe_all_tables(self) -> str:
+        """Use this function to describe every table in the dataset at once.
+        Prefer it over calling describe_table for each table.
+        Returns:
+            str: JSON object mapping each table name to its description and columns.
+        """
+        # Go through the cached list_tables, which returns str(list_of_ids)
+        # on success and an "Error ..." message otherwise.
+        tables = self.list_tables()
+        try:
+            table_ids = ast.literal_eval(tables)
+        except (ValueError, SyntaxError):
+            return tables
+        schemas = {}
+        for table_id, desc in zip(
+            table_ids, _DESCRIBE_POOL.map(self.describe_table, table_ids)
+        ):
+            try:
+                schemas[table_id] = json.loads(desc)
+            except ValueError:
+                schemas[table_id] = desc
+        return json.dumps(schemas, ensure_ascii=False)
+
+
+def get_user_id() -> str:
+    load_dotenv()
+    return os.getenv("USER_ID", "sky")
+
+
+def build_agent(
+    tool_hooks: Optional[List[Callable]] = None, db_pool_size: int = 5
+) -> Agent:
     load_dotenv()
     PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
     DATASET = os.getenv("BIGQUERY_DATASET")
     LOCATION = os.getenv("BIGQUERY_LOCATION", "asia-southeast1")
-    USER_ID = os.getenv("USER_ID", "sky")
+    USER_ID = get_user_id()
 
-    storage = SqliteStorage(
+    storage = PooledSqliteStorage(
         table_name="agent_sessions",
-        db_file=DB_URL,
+        db_engine=get_db_engine(db_pool_size),
     )
 
-    bq_tools = GoogleBigQueryTools(
+    bq_tools = BatchedBigQueryTools(
         project=PROJECT_ID,
         dataset=DATASET,
         location=LOCATION,
@@ -42,6 +206,7 @@ def build_agent():
             location=LOCATION,
         ),
         tools=[bq_tools],
+        tool_hooks=tool_hooks,
         storage=storage,
         user_id=USER_ID,
         add_history_to_messages=True,
@@ -1,22 +1,43 @@
-import contextlib
-import io
+import asyncio
+import gzip
+import hashlib
 import os
-import uuid
-from datetime import datetime
+import queue
+import re
+import reprlib
+import secrets
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import date
 from pathlib import Path
 from threading import Lock
-from typing import Any, Callable, Dict, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 
-from agent import build_agent
+import anyio.to_thread
+import orjson
+from agent import build_agent, get_user_id
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from rich.console import Console
 from rich.theme import Theme
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from agno.agent import Agent
+from agno.run.response import RunResponseContentEvent
 
 load_dotenv()
 
@@ -35,56 +56,172 @@ console = Console(
 )
 
 
+_TRUTHY = frozenset({"1", "true", "t", "yes", "y", "on"})
+
+
 def env_flag(name: str, default: bool = False) -> bool:
-    val = os.getenv(name)
-    return (
-        (str(val).strip().lower() in {"1", "true", "t", "yes", "y", "on"})
-        if val is not None
-        else default
-    )
+    val = os.environ.get(name)
+    return val.strip().lower() in _TRUTHY if val is not None else default
 
 
 LOG_TOOL_LIVE = env_flag("LOG_TOOL_LIVE", default=False)
 LOG_TOOL_SUMMARY = env_flag("LOG_TOOL_SUMMARY", default=True)
 LOG_DEBUG = env_flag("LOG_DEBUG", default=False)
 LOG_TOOL_PREVIEW = env_flag("LOG_TOOL_PREVIEW", default=False)
+KEEP_TOOL_PREVIEW = LOG_TOOL_PREVIEW or LOG_TOOL_SUMMARY
+
+PREVIEW_CHARS = 800
+# Bounded repr so large non-string results are never fully stringified.
+# Strings (what the BigQuery tools return) are cut before repr instead, which
+# keeps the preview a plain prefix.
+_REPR = reprlib.Repr()
+_REPR.maxstring = PREVIEW_CHARS
+_REPR.maxother = PREVIEW_CHARS
+_REPR.maxlist = _REPR.maxtuple = _REPR.maxdict = _REPR.maxset = 20
+
+
+def _preview(result: Any) -> str:
+    if isinstance(result, str):
+        return repr(result[:PREVIEW_CHARS])[:PREVIEW_CHARS]
+    return _REPR.repr(result)[:PREVIEW_CHARS]
+
 
-STATIC_DIR = Path("static")
+STATIC_DIR = Path(__file__).parent / "static"
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", str(os.cpu_count() or 1)))
+USER_ID = get_user_id()
+CACHE_TTL_S = float(os.getenv("CACHE_TTL_S", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+TOOL_LOGS_MAX_SESSIONS = int(os.getenv("TOOL_LOGS_MAX_SESSIONS", "1024"))
+TOOL_LOGS_TTL_S = float(os.getenv("TOOL_LOGS_TTL_S", "3600"))
+TOOL_LOGS_MAX_CALLS = int(os.getenv("TOOL_LOGS_MAX_CALLS", "100"))
+
+
+app = FastAPI(
+    title="Agno BigQuery Agent API", default_response_class=ORJSONResponse
+)
+
+
+class _PathCORSMiddleware:
+    # CORS only matters for the JSON API; "/" and "/health" are same-origin,
+    # so only requests under `prefix` go through CORSMiddleware.
+    def __init__(self, app: ASGIApp, prefix: str, **options: Any) -> None:
+        self.app = app
+        self.prefix = prefix
+        self.cors = CORSMiddleware(app, **options)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.prefix):
+            await self.cors(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
 
 
-app = FastAPI(title="Agno BigQuery Agent API")
 app.add_middleware(
-    CORSMiddleware,
+    _PathCORSMiddleware,
+    prefix="/api/",
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
 
-AGENT: Agent = build_agent()
-if hasattr(AGENT, "show_tool_calls"):
-    try:
-        AGENT.show_tool_calls = False
-    except Exception:
-        pass
+@app.on_event("startup")
+async def _size_threadpool() -> None:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
 
-TOOL_LOGS: Dict[str, List[Dict[str, Any]]] = {}
+# session_id -> (created_at, calls), oldest session first. TOOL_LOGS_LOCK only
+# guards adding/evicting sessions (once per turn); a session's calls are
+# guarded by its stripe lock so concurrent sessions don't contend.
+TOOL_LOGS: "OrderedDict[str, Tuple[float, Deque[Dict[str, Any]]]]" = OrderedDict()
 TOOL_LOGS_LOCK = Lock()
+_STRIPES = [Lock() for _ in range(64)]
 
 
-def _logs_reset(session_id: str) -> None:
+def _lock_for(session_id: str) -> Lock:
+    return _STRIPES[hash(session_id) & 63]
+
+
+def _logs_new(session_id: str) -> Deque[Dict[str, Any]]:
+    now = time.monotonic()
+    calls: Deque[Dict[str, Any]] = deque(maxlen=TOOL_LOGS_MAX_CALLS)
     with TOOL_LOGS_LOCK:
-        TOOL_LOGS[session_id] = []
+        TOOL_LOGS[session_id] = (now, calls)
+        TOOL_LOGS.move_to_end(session_id)
+        while TOOL_LOGS:
+            created_at, _ = next(iter(TOOL_LOGS.values()))
+            if len(TOOL_LOGS) <= TOOL_LOGS_MAX_SESSIONS and now - created_at <= TOOL_LOGS_TTL_S:
+                break
+            TOOL_LOGS.popitem(last=False)
+    return calls
+
+
+def _logs_reset(session_id: str) -> None:
+    _logs_new(session_id)
 
 
 def _logs_append(session_id: str, entry: Dict[str, Any]) -> None:
-    with TOOL_LOGS_LOCK:
-        TOOL_LOGS.setdefault(session_id, []).append(entry)
+    logged = TOOL_LOGS.get(session_id)
+    calls = logged[1] if logged is not None else _logs_new(session_id)
+    with _lock_for(session_id):
+        calls.append(entry)
 
 
-def _logs_get(session_id: str) -> List[Dict[str, Any]]:
+def _logs_freeze(session_id: str) -> Tuple[Dict[str, Any], ...]:
+    # Called once the turn is over: detach the session's calls so the summary
+    # and the response share one immutable snapshot.
     with TOOL_LOGS_LOCK:
-        return list(TOOL_LOGS.get(session_id, []))
+        logged = TOOL_LOGS.pop(session_id, None)
+    if logged is None:
+        return ()
+    with _lock_for(session_id):
+        return tuple(logged[1])
+
+
+# Session whose tool calls are being logged; set per turn by run_agent and
+# stream_agent and read by capture_tool_calls in the same thread.
+LOG_KEY: ContextVar[str] = ContextVar("log_key", default="default")
+
+# Only touched from the event loop thread, so no lock is needed.
+ANSWER_CACHE: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+TIME_SENSITIVE_RE = re.compile(
+    r"\b(today|now|tonight|yesterday|current|latest)\b|วันนี้|ตอนนี้|ล่าสุด|เมื่อวาน",
+    re.IGNORECASE,
+)
+
+
+def _cache_key(session_id: Optional[str], message: str) -> Optional[str]:
+    # Keyed per session: the agent answers with the session's history, so the
+    # same words can mean something else elsewhere. A hit is a repeat of a
+    # turn that is already in this session's stored history. Freshly
+    # generated session ids (None here) can never repeat, so skip them.
+    if session_id is None:
+        return None
+    normalized = message.strip().lower()
+    if TIME_SENSITIVE_RE.search(normalized) or date.today().isoformat() in normalized:
+        return None
+    return hashlib.blake2b(f"{session_id}\0{normalized}".encode()).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[str]:
+    hit = ANSWER_CACHE.get(key)
+    if hit is None:
+        return None
+    answer, stored_at = hit
+    if time.monotonic() - stored_at > CACHE_TTL_S:
+        del ANSWER_CACHE[key]
+        return None
+    ANSWER_CACHE.move_to_end(key)
+    return answer
+
+
+def _cache_put(key: str, answer: str) -> None:
+    ANSWER_CACHE[key] = (answer, time.monotonic())
+    ANSWER_CACHE.move_to_end(key)
+    while len(ANSWER_CACHE) > CACHE_MAX_ENTRIES:
+        ANSWER_CACHE.popitem(last=False)
 
 
 class ChatIn(BaseModel):
@@ -92,9 +229,52 @@ class ChatIn(BaseModel):
     session_id: Optional[str] = None
 
 
+# The UI is a single immutable page, so read and compress it once. Each
+# encoding is a different representation and gets its own strong ETag.
+INDEX_BYTES = (STATIC_DIR / "index.html").read_bytes()
+INDEX_GZ = gzip.compress(INDEX_BYTES, 6)
+_INDEX_DIGEST = hashlib.blake2b(INDEX_BYTES, digest_size=8).hexdigest()
+INDEX_ETAG = f'"{_INDEX_DIGEST}"'
+INDEX_GZ_ETAG = f'"{_INDEX_DIGEST}-gz"'
+INDEX_HEADERS = {"Cache-Control": "public, max-age=60", "Vary": "Accept-Encoding"}
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    # Honour q-values: "gzip;q=0" refuses gzip, and "*" stands in for any
+    # coding that isn't listed explicitly.
+    qvalues: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = q
+    return qvalues.get("gzip", qvalues.get("*", 0.0)) > 0
+
+
 @app.get("/")
-def index():
-    return FileResponse(STATIC_DIR / "index.html")
+async def index(request: Request):
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        body, etag, extra = INDEX_GZ, INDEX_GZ_ETAG, {"Content-Encoding": "gzip"}
+    else:
+        body, etag, extra = INDEX_BYTES, INDEX_ETAG, {}
+    headers = {**INDEX_HEADERS, "ETag": etag}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=body, media_type="text/html", headers={**headers, **extra}
+    )
 
 
 @app.get("/health")
@@ -102,127 +282,360 @@ def health():
     return {"ok": True}
 
 
+# Log sinks are picked once from the env flags so the hot paths don't branch.
+if LOG_DEBUG:
+
+    def _dbg_method(method_name: str) -> None:
+        console.print(
+            f"[tool.ts]{time.strftime('%H:%M:%S')}[/tool.ts] use [tool.name]{method_name}[/tool.name]"
+        )
+
+    def _dbg_method_err(method_name: str, e: Exception) -> None:
+        console.print(f"[tool.err]method {method_name} raised: {e!r}[/tool.err]")
+
+else:
+
+    def _dbg_method(method_name: str) -> None:
+        pass
+
+    def _dbg_method_err(method_name: str, e: Exception) -> None:
+        pass
+
+
+if LOG_TOOL_LIVE:
+
+    def _on_tool_ok(
+        ts: str, sid: str, name: str, arguments: Dict[str, Any], entry: Dict[str, Any]
+    ) -> None:
+        console.print(
+            f"[tool.ts]{ts}[/tool.ts] [tool.sid]({sid})[/tool.sid] "
+            f"[tool.name]{name}[/tool.name] [tool.ok]OK[/tool.ok]"
+        )
+        console.print(f"  [tool.args]args[/tool.args]= {arguments}")
+        if LOG_TOOL_PREVIEW:
+            console.print(f"  preview= {entry['result_preview']}")
+
+    def _on_tool_err(
+        ts: str, sid: str, name: str, arguments: Dict[str, Any], e: Exception
+    ) -> None:
+        console.print(
+            f"[tool.ts]{ts}[/tool.ts] [tool.sid]({sid})[/tool.sid] "
+            f"[tool.name]{name}[/tool.name] [tool.err]ERROR[/tool.err] {e!r}"
+        )
+        console.print(f"  [tool.args]args[/tool.args]= {arguments}")
+
+else:
+
+    def _on_tool_ok(
+        ts: str, sid: str, name: str, arguments: Dict[str, Any], entry: Dict[str, Any]
+    ) -> None:
+        pass
+
+    def _on_tool_err(
+        ts: str, sid: str, name: str, arguments: Dict[str, Any], e: Exception
+    ) -> None:
+        pass
+
+
 def capture_tool_calls(
     agent: Agent, function_name: str, function_call: Callable, arguments: Dict[str, Any]
 ):
-    sid = (getattr(agent, "context", {}) or {}).get("_log_key", "default")
-    ts = datetime.now().strftime("%H:%M:%S")
+    sid = LOG_KEY.get()
+    ts = time.strftime("%H:%M:%S")
     try:
         result = function_call(**arguments)
-        entry = {
-            "time": ts,
-            "name": function_name,
-            "args": arguments,
-            "result_preview": repr(result)[:800],
-        }
+        entry = {"time": ts, "name": function_name, "args": arguments}
+        if KEEP_TOOL_PREVIEW:
+            entry["result_preview"] = _preview(result)
         _logs_append(sid, entry)
-
-        if LOG_TOOL_LIVE:
-            console.print(
-                f"[tool.ts]{ts}[/tool.ts] [tool.sid]({sid})[/tool.sid] "
-                f"[tool.name]{function_name}[/tool.name] [tool.ok]OK[/tool.ok]"
-            )
-            console.print(f"  [tool.args]args[/tool.args]= {arguments}")
-            if LOG_TOOL_PREVIEW:
-                console.print(f"  preview= {entry['result_preview']}")
+        _on_tool_ok(ts, sid, function_name, arguments, entry)
         return result
 
     except Exception as e:
         entry = {"time": ts, "name": function_name, "args": arguments, "error": repr(e)}
         _logs_append(sid, entry)
+        _on_tool_err(ts, sid, function_name, arguments, e)
+        raise
 
-        if LOG_TOOL_LIVE:
-            console.print(
-                f"[tool.ts]{ts}[/tool.ts] [tool.sid]({sid})[/tool.sid] "
-                f"[tool.name]{function_name}[/tool.name] [tool.err]ERROR[/tool.err] {e!r}"
-            )
-            console.print(f"  [tool.args]args[/tool.args]= {arguments}")
+
+def make_agent() -> Agent:
+    # One SQLite connection per pooled agent plus one spare.
+    agent = build_agent(
+        tool_hooks=[capture_tool_calls], db_pool_size=AGENT_POOL_SIZE + 1
+    )
+    if hasattr(agent, "show_tool_calls"):
+        try:
+            agent.show_tool_calls = False
+        except Exception:
+            pass
+    return agent
+
+
+# Built on first use (or by the startup warm-up) so importing the app and
+# answering /health never wait on Gemini/BigQuery client setup.
+AGENT_POOL: "Optional[queue.Queue[Agent]]" = None
+AGENT_POOL_LOCK = Lock()
+
+
+def get_agent_pool() -> "queue.Queue[Agent]":
+    global AGENT_POOL
+    if AGENT_POOL is None:
+        with AGENT_POOL_LOCK:
+            if AGENT_POOL is None:
+                pool: "queue.Queue[Agent]" = queue.Queue()
+                for _ in range(AGENT_POOL_SIZE):
+                    pool.put(make_agent())
+                AGENT_POOL = pool
+    return AGENT_POOL
+
+
+def _warm_agent_pool() -> None:
+    try:
+        get_agent_pool()
+    except Exception as e:
+        console.print(f"[tool.err]Agent pool warm-up failed: {e!r}[/tool.err]")
+
+
+# Checkouts wait on app.state.agent_slots, on the event loop, rather than
+# parking a worker thread in queue.get(); holding a slot guarantees the pool
+# has a free agent. The semaphore is created at startup so it belongs to the
+# loop that serves the app.
+async def checkout_agent() -> Agent:
+    slots: asyncio.Semaphore = app.state.agent_slots
+    await slots.acquire()
+    try:
+        pool = AGENT_POOL
+        if pool is None:
+            pool = await run_in_threadpool(get_agent_pool)
+        return pool.get_nowait()
+    except BaseException:
+        slots.release()
         raise
 
 
-AGENT.tool_hooks = (getattr(AGENT, "tool_hooks", []) or []) + [capture_tool_calls]
+def checkin_agent(agent: Agent) -> None:
+    # Must run on the event loop thread.
+    get_agent_pool().put_nowait(agent)
+    app.state.agent_slots.release()
+
+
+@app.on_event("startup")
+async def _start_agent_pool() -> None:
+    app.state.agent_slots = asyncio.Semaphore(AGENT_POOL_SIZE)
+    app.state.agent_pool_warmup = asyncio.ensure_future(
+        run_in_threadpool(_warm_agent_pool)
+    )
 
 
-def choose_session_id(agent: Agent, requested: Optional[str]) -> str:
+def supplied_session_id(requested: Optional[str]) -> Optional[str]:
     env_sid = (os.getenv("SESSION_ID") or "").strip()
     req_sid = (requested or "").strip()
-    return env_sid or req_sid or f"{agent.user_id}-{uuid.uuid4().hex[:8]}"
+    return env_sid or req_sid or None
+
+
+def new_session_id(user_id: str) -> str:
+    return f"{user_id}-{secrets.token_hex(4)}"
+
+
+_METHOD_NAMES = ("create_response", "get_response", "run", "respond")
+_RESOLVED_METHOD: Dict[type, str] = {}
+
+
+def _result_text(result: Any) -> Optional[str]:
+    if isinstance(result, str):
+        return result
+    text = getattr(result, "content", None) or getattr(result, "text", None)
+    return str(text) if text is not None else None
 
 
 def run_agent(agent: Agent, message: str, session_id: str) -> str:
-    agent.context = {"_log_key": session_id}
     _logs_reset(session_id)
+    token = LOG_KEY.set(session_id)
+    try:
+        return _run_agent(agent, message, session_id)
+    finally:
+        LOG_KEY.reset(token)
+
 
-    for method_name in ("create_response", "get_response", "run", "respond"):
+def _run_agent(agent: Agent, message: str, session_id: str) -> str:
+    resolved = _RESOLVED_METHOD.get(type(agent))
+    if resolved is not None:
+        method = getattr(agent, resolved)
+        text = _result_text(method(message, session_id=session_id, stream=False))
+        if text is None:
+            # Same outcome the probe treats as a failure; probe again next call.
+            _RESOLVED_METHOD.pop(type(agent), None)
+            raise RuntimeError(f"{type(agent).__name__}.{resolved} returned no text")
+        return text
+
+    for method_name in _METHOD_NAMES:
         method = getattr(agent, method_name, None)
         if callable(method):
-            if LOG_DEBUG:
-                console.print(
-                    f"[tool.ts]{datetime.now():%H:%M:%S}[/tool.ts] use [tool.name]{method_name}[/tool.name]"
-                )
+            _dbg_method(method_name)
             try:
-                result = method(message, session_id=session_id)
-                if isinstance(result, str):
-                    return result
-                text = getattr(result, "content", None) or getattr(result, "text", None)
-                if text is not None:
-                    return str(text)
+                text = _result_text(
+                    method(message, session_id=session_id, stream=False)
+                )
             except Exception as e:
-                if LOG_DEBUG:
-                    console.print(
-                        f"[tool.err]method {method_name} raised: {e!r}[/tool.err]"
-                    )
+                _dbg_method_err(method_name, e)
+                continue
+            if text is not None:
+                _RESOLVED_METHOD[type(agent)] = method_name
+                return text
 
-    buf = io.StringIO()
+    raise RuntimeError(f"{type(agent).__name__} has no usable response method")
+
+
+def stream_agent(
+    agent: Agent, message: str, session_id: str, emit: Callable[[str], None]
+) -> str:
+    _logs_reset(session_id)
+    token = LOG_KEY.set(session_id)
+    # agno's run() latches stream=True onto the agent; undo that so the pooled
+    # agent answers non-streaming calls normally afterwards.
+    saved = (agent.stream, agent.stream_intermediate_steps)
     try:
-        with contextlib.redirect_stdout(buf):
-            agent.print_response(message, session_id=session_id, stream=False)
-        return buf.getvalue().strip()
+        parts: List[str] = []
+        for event in agent.run(message, session_id=session_id, stream=True):
+            if isinstance(event, RunResponseContentEvent) and isinstance(event.content, str):
+                if event.content:
+                    parts.append(event.content)
+                    emit(event.content)
+        return "".join(parts)
     finally:
-        buf.close()
+        agent.stream, agent.stream_intermediate_steps = saved
+        LOG_KEY.reset(token)
 
 
-def print_tool_summary(session_id: str) -> None:
-    calls = _logs_get(session_id)
+def print_tool_summary(session_id: str, calls: Tuple[Dict[str, Any], ...]) -> None:
     if not (LOG_TOOL_SUMMARY and calls):
         return
-    console.rule(f"[tool.name]Tool calls[/tool.name] [tool.sid]{session_id}[/tool.sid]")
-    for c in calls:
-        if "error" in c:
-            console.print(
-                f"[tool.ts]{c['time']}[/tool.ts] [tool.name]{c['name']}[/tool.name] [tool.err]ERROR[/tool.err]"
-            )
-            console.print(f"  [tool.args]args[/tool.args]= {c['args']}")
-            console.print(f"  [tool.err]{c['error']}[/tool.err]")
-        else:
-            console.print(
-                f"[tool.ts]{c['time']}[/tool.ts] [tool.name]{c['name']}[/tool.name] [tool.ok]OK[/tool.ok]"
-            )
-            console.print(f"  [tool.args]args[/tool.args]= {c['args']}")
-            if LOG_TOOL_PREVIEW:
-                console.print(f"  preview= {c['result_preview']}")
-    console.rule()
+    # Render the whole summary off-screen and emit it with one write.
+    with console.capture() as capture:
+        console.rule(f"[tool.name]Tool calls[/tool.name] [tool.sid]{session_id}[/tool.sid]")
+        for c in calls:
+            if "error" in c:
+                console.print(
+                    f"[tool.ts]{c['time']}[/tool.ts] [tool.name]{c['name']}[/tool.name] [tool.err]ERROR[/tool.err]"
+                )
+                console.print(f"  [tool.args]args[/tool.args]= {c['args']}")
+                console.print(f"  [tool.err]{c['error']}[/tool.err]")
+            else:
+                console.print(
+                    f"[tool.ts]{c['time']}[/tool.ts] [tool.name]{c['name']}[/tool.name] [tool.ok]OK[/tool.ok]"
+                )
+                console.print(f"  [tool.args]args[/tool.args]= {c['args']}")
+                if LOG_TOOL_PREVIEW:
+                    console.print(f"  preview= {c['result_preview']}")
+        console.rule()
+    console.file.write(capture.get())
+    console.file.flush()
 
 
 @app.post("/api/chat")
-def chat(payload: ChatIn):
-    session_id = choose_session_id(AGENT, payload.session_id)
+async def chat(payload: ChatIn):
+    supplied = supplied_session_id(payload.session_id)
+    session_id = supplied or new_session_id(USER_ID)
+    cache_key = _cache_key(supplied, payload.message)
+    cached = _cache_get(cache_key) if cache_key else None
+    if cached is not None:
+        return ORJSONResponse(
+            {"session_id": session_id, "answer": cached, "tool_calls": []}
+        )
+
+    agent: Optional[Agent] = None
     try:
-        answer = run_agent(AGENT, payload.message, session_id)
-        print_tool_summary(session_id)
-        return JSONResponse(
-            {
-                "session_id": session_id,
-                "answer": answer,
-                "tool_calls": _logs_get(session_id),
-            }
+        agent = await checkout_agent()
+        answer = await run_in_threadpool(run_agent, agent, payload.message, session_id)
+        calls = _logs_freeze(session_id)
+        await run_in_threadpool(print_tool_summary, session_id, calls)
+        if cache_key and answer:
+            _cache_put(cache_key, answer)
+        return ORJSONResponse(
+            {"session_id": session_id, "answer": answer, "tool_calls": calls}
         )
     except Exception as e:
+        # Drop whatever the failed turn logged so TOOL_LOGS doesn't hold it.
+        _logs_freeze(session_id)
         console.print(f"[tool.err]Unhandled error in /api/chat: {e!r}[/tool.err]")
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "session_id": session_id,
                 "error": "Internal error while generating response.",
             },
             status_code=500,
         )
+    finally:
+        if agent is not None:
+            checkin_agent(agent)
+
+
+_STREAM_DONE = object()
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(payload: ChatIn):
+    supplied = supplied_session_id(payload.session_id)
+    session_id = supplied or new_session_id(USER_ID)
+    cache_key = _cache_key(supplied, payload.message)
+    cached = _cache_get(cache_key) if cache_key else None
+
+    loop = asyncio.get_running_loop()
+    chunks: "asyncio.Queue[Any]" = asyncio.Queue()
+
+    def emit(item: Any) -> None:
+        loop.call_soon_threadsafe(chunks.put_nowait, item)
+
+    def produce(agent: Agent) -> Optional[Tuple[str, Tuple[Dict[str, Any], ...]]]:
+        try:
+            answer = stream_agent(agent, payload.message, session_id, emit)
+            calls = _logs_freeze(session_id)
+            print_tool_summary(session_id, calls)
+            return answer, calls
+        except Exception as e:
+            _logs_freeze(session_id)
+            console.print(
+                f"[tool.err]Unhandled error in /api/chat/stream: {e!r}[/tool.err]"
+            )
+            emit(e)
+            return None
+        finally:
+            loop.call_soon_threadsafe(checkin_agent, agent)
+            emit(_STREAM_DONE)
+
+    async def event_gen() -> AsyncIterator[str]:
+        yield _sse("session", {"session_id": session_id})
+        if cached is not None:
+            yield _sse("token", {"text": cached})
+            yield _sse("tool_calls", {"tool_calls": []})
+            return
+
+        try:
+            agent = await checkout_agent()
+        except Exception as e:
+            console.print(
+                f"[tool.err]Unhandled error in /api/chat/stream: {e!r}[/tool.err]"
+            )
+            yield _sse("error", {"error": "Internal error while generating response."})
+            return
+
+        producer = asyncio.ensure_future(run_in_threadpool(produce, agent))
+        while (item := await chunks.get()) is not _STREAM_DONE:
+            if isinstance(item, Exception):
+                yield _sse("error", {"error": "Internal error while generating response."})
+            else:
+                yield _sse("token", {"text": item})
+        result = await producer
+        if result is None:
+            return
+        answer, calls = result
+        if cache_key and answer:
+            _cache_put(cache_key, answer)
+        yield _sse("tool_calls", {"tool_calls": calls})
+
+    return StreamingResponse(event_gen(), media_type="text/event-stream")
+